@@ -8,6 +8,9 @@ import sys
 import random
 import itertools
 import math
+from collections import deque
+
+import numpy as np
 
 class Illegal(Exception):
     pass
@@ -20,6 +23,9 @@ FLAGGED = 2
 #
 MINE = -1
 
+# string representation of uncovered fields without a mine, indexed by number of neighboring mines
+_DIGITS = (".", "1", "2", "3", "4", "5", "6", "7", "8")
+
 # terminal colors
 def color(color, s):
   return ("\033%s%s%s" % (color, s, "\033[0m"))
@@ -30,111 +36,167 @@ def red(s):
 def blue(s):
   return color("[0;34m", s)
 
+RED_M = red("M")
+
+# string representation of uncovered fields, indexed by field value (MINE == -1 picks the last entry)
+_VALUES = np.array(_DIGITS + ("M",), dtype=object)
+_VALUES_COLOR = np.array(_DIGITS + (RED_M,), dtype=object)
+
 
 class Minesweeper:
-  
+
+  # relative positions of the fields in a 3x3 neighborhood, _including_ the center
+  _OFFSETS = tuple((di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1))
+
   def __init__(self, height=10, width=10, mines=15):
     self.height = height
     self.width = width
     self.mines = mines
 
-    self.grid = [[0 for _ in range(width)] for _ in range(height)]
+    self.grid = np.zeros((height, width), dtype=np.int8)
     self._place_mines()
-    for (i, j) in self.fields():
-      if self.grid[i][j] != MINE:
-        self.grid[i][j] = sum(self.grid[k][l] == MINE for (k,l) in self.neighbors(i,j))
-
-    self.state_grid = [[COVERED for _ in range(width)] for _ in range(height)]
+    is_mine = self.grid == MINE
+    # count mines in each 3x3 neighborhood by summing shifted copies of the padded mine mask
+    padded = np.pad(is_mine.astype(np.int8), 1)
+    counts = sum(padded[k:k+height, l:l+width] for k in range(3) for l in range(3))
+    self.grid = np.where(is_mine, MINE, counts).astype(np.int8)
+
+    self.state_grid = np.full_like(self.grid, COVERED)
+
+    # flat row-major views onto the grids: field (i, j) lives at position i*self._stride + j
+    self._stride = width
+    self._cells = self.grid.reshape(-1)
+    self._states = self.state_grid.reshape(-1)
+
+    # bookkeeping so that game_lost/game_won need not scan the grids
+    self._lost = False
+    self._uncovered = 0  # number of uncovered fields without a mine
+    self._nonmine = height * width - mines
+
+    # output template for a single row, wide enough for the largest field number
+    field_width = math.floor(math.log((width+1) * (height+1), 10)) + 2
+    self._row_fmt = ('{:^' + str(field_width) + '}') * width + '\n'
+    self._covered = np.array(["[%d]" % p for p in range(height * width)], dtype=object)
+    self._covered = self._covered.reshape(height, width)
 
   def _place_mines(self):
-    random.seed()
-    fields = list(self.fields())
-    for _ in range(self.mines):
-      (i,j) = random.choice(fields)
-      self.grid[i][j] = MINE
-      fields.remove((i,j))
+    positions = random.sample(range(self.height * self.width), self.mines)
+    self.grid.flat[positions] = MINE
 
   def neighbors(self, i, j):
     """Returns the neighbor fields to a given field, _including_ itself!"""
-    rows = range(max(i-1, 0), min(i+2, self.height))
-    cols = range(max(j-1, 0), min(j+2, self.width))
-    return itertools.product(rows, cols)
+    if 0 < i < self.height-1 and 0 < j < self.width-1:
+      return self._neighbors_interior(i, j)
+    return ((i+di, j+dj) for (di, dj) in self._OFFSETS
+            if 0 <= i+di < self.height and 0 <= j+dj < self.width)
+
+  def _neighbors_interior(self, i, j):
+    """Like neighbors, but assumes that (i, j) is not on the border and skips bounds checks."""
+    return ((i+di, j+dj) for (di, dj) in self._OFFSETS)
 
   def uncover(self, i, j):
-    if self.state_grid[i][j] != COVERED:
+    """Uncovers a field and returns whether the game is over."""
+    p = i*self._stride + j
+    if self._states[p] != COVERED:
       raise Illegal
-    self.state_grid[i][j] = UNCOVERED
-    if self.grid[i][j] == 0:
-      self._uncover_cascade(i, j)
+    self._states[p] = UNCOVERED
+    if self._cells[p] == MINE:
+      self._lost = True
+    else:
+      self._uncovered += 1
+      if self._cells[p] == 0:
+        self._uncover_cascade(i, j)
+    return self.game_over()
 
   def flag(self, i, j):
-    if self.state_grid[i][j] != COVERED:
+    """Flags a field and returns whether the game is over."""
+    p = i*self._stride + j
+    if self._states[p] != COVERED:
       raise Illegal
-    self.state_grid[i][j] = FLAGGED
+    self._states[p] = FLAGGED
+    return self.game_over()
 
   def unflag(self, i, j):
-    if self.state_grid[i][j] != FLAGGED:
+    """Unflags a field and returns whether the game is over."""
+    p = i*self._stride + j
+    if self._states[p] != FLAGGED:
       raise Illegal
-    self.state_grid[i][j] = COVERED
+    self._states[p] = COVERED
+    return self.game_over()
 
   def game_lost(self):
-    return any(self.grid[i][j] == MINE and self.state_grid[i][j] == UNCOVERED
-               for (i,j) in self.fields())
+    return self._lost
 
   def game_won(self):
-    for (i, j) in self.fields():
-      if self.grid[i][j] == MINE and self.state_grid[i][j] != FLAGGED:
-        return False
-      if self.grid[i][j] != MINE and self.state_grid[i][j] != UNCOVERED:
-        return False
-    return True
+    """The game is won once all fields without a mine are uncovered; flags are not required."""
+    return not self._lost and self._uncovered == self._nonmine
 
   def game_over(self):
     return self.game_lost() or self.game_won()
 
   def _uncover_cascade(self, i, j):
-    todo = set(self.neighbors(i, j))
+    # breadth-first flood fill over flat positions; the visited bitmap makes sure every
+    # field is enqueued and inspected at most once
+    visited = bytearray(self.height * self._stride)
+    visited[i*self._stride + j] = 1
+    todo = deque([i*self._stride + j])
     while todo:
-      (k, l) = todo.pop()
-      if self.state_grid[k][l] != COVERED or self.grid[k][l] == MINE:
-        continue
-      
-      self.state_grid[k][l] = UNCOVERED
-      if self.grid[k][l] == 0:
-        todo.update(self.neighbors(k, l))
+      (i, j) = divmod(todo.popleft(), self._stride)
+      interior = 0 < i < self.height-1 and 0 < j < self.width-1
+      for (di, dj) in self._OFFSETS:
+        (k, l) = (i+di, j+dj)
+        if not interior and not (0 <= k < self.height and 0 <= l < self.width):
+          continue
+        p = k*self._stride + l
+        if visited[p]:
+          continue
+        visited[p] = 1
+        if self._states[p] != COVERED or self._cells[p] == MINE:
+          continue
+        self._states[p] = UNCOVERED
+        self._uncovered += 1
+        if self._cells[p] == 0:
+          todo.append(p)
 
   def fields(self):
     return itertools.product(range(self.height), range(self.width))
 
   def str_of_field(self, i, j, game_over=False, color=False):
-    if self.state_grid[i][j] == COVERED and not game_over:
-      return "[" + str(i*self.width + j) + "]"
-    elif self.state_grid[i][j] == FLAGGED:
-      if game_over and self.grid[i][j] != MINE:
+    p = i*self._stride + j
+    (state, value) = (self._states[p], self._cells[p])
+    if state == COVERED and not game_over:
+      return self._covered[i, j]
+    elif state == FLAGGED:
+      if game_over and value != MINE:
         return "WF"
       return "F"
-    elif self.state_grid[i][j] == UNCOVERED or game_over:
-      if self.grid[i][j] == MINE:
+    elif state == UNCOVERED or game_over:
+      if value == MINE:
         if color:
-          return red("M")
+          return RED_M
         else:
           return "M"
-      if self.grid[i][j] == 0:
-        return "."
-      else:
-        return str(self.grid[i][j])
+      return _DIGITS[value]
     else:
       raise Exception
 
   def __str__(self, game_over=False, color=False):
-    field_width = math.floor(math.log((self.width+1) * (self.height+1), 10)) + 2
-    f = (('{:^' + str(field_width) + '}') * self.width + '\n') * self.height
-    return f.format(*(self.str_of_field(i,j, game_over, color=color) for (i,j) in self.fields()))
+    # vectorized counterpart of str_of_field: start from the field values, then overlay
+    # covered and flagged fields
+    tokens = (_VALUES_COLOR if color else _VALUES)[self.grid]
+    if not game_over:
+      tokens = np.where(self.state_grid == COVERED, self._covered, tokens)
+    flagged = self.state_grid == FLAGGED
+    tokens = np.where(flagged, "F", tokens)
+    if game_over:
+      tokens = np.where(flagged & (self.grid != MINE), "WF", tokens)
+    return ''.join(self._row_fmt.format(*row) for row in tokens.tolist())
     
 
 ####################################################################################################
 
-def try_input_until(prompt, p=lambda _: True):
+def try_input_until(prompt, p=lambda _: True, parse=lambda s: s):
+  """Prompts until the input parses and the parsed value satisfies p, then returns that value."""
   while True:
     try:
       inp = input(prompt)
@@ -144,21 +206,30 @@ def try_input_until(prompt, p=lambda _: True):
       exit(0)
     except:
       continue
-    if p(inp):
-      return inp
+    try:
+      value = parse(inp)
+    except ValueError:
+      continue
+    if p(value):
+      return value
+
+def parse_number(s):
+  if not s.isdigit():
+    raise ValueError(s)
+  return int(s)
+
+def parse_numbers(s):
+  return [parse_number(d) for d in s.split()]
 
 def custom_game_prompt():
   prompt = "Width?\n>> "
-  inp = try_input_until(prompt, lambda s: s.isdigit() and (int(s) in range(1, 100)))
-  width = int(inp)
+  width = try_input_until(prompt, lambda n: 1 <= n < 100, parse_number)
 
   prompt = "Height?\n>> "
-  inp = try_input_until(prompt, lambda s: s.isdigit() and (int(s) in range(1, 100)))
-  height = int(inp)
+  height = try_input_until(prompt, lambda n: 1 <= n < 100, parse_number)
 
   prompt = "Mines?\n>> "
-  inp = try_input_until(prompt, lambda s: s.isdigit() and (int(s) in range(0, height*width)))
-  mines = int(inp)
+  mines = try_input_until(prompt, lambda n: n < height*width, parse_number)
 
   return Minesweeper(height=height, width=width, mines=mines)
 
@@ -175,8 +246,7 @@ if __name__ == '__main__':
     print(('{:#^' + str(width) + '}').format('  MINESWEEPER  '))
     print("#"*width)
     prompt = "What do you wanna do?\n\t(1) Quick Game\n\t(2) Custom Game\n\t(3) Exit\n>> "
-    inp = try_input_until(prompt, lambda s: s.isdigit() and (int(s) in range(1,4)))
-    inp = int(inp)
+    inp = try_input_until(prompt, lambda n: 1 <= n < 4, parse_number)
     if inp == 1:
       game = Minesweeper()
     elif inp == 2:
@@ -185,35 +255,35 @@ if __name__ == '__main__':
       print("\n")
       break
 
-    while not game.game_over():
+    over = False
+    while not over:
       print("#"*width)
       print(game)
 
       prompt = "What do you wanna do?\n\t(1) Uncover\n\t(2) Flag\n\t(3) Unflag\n\t(4) Give Up\n>> "
-      inp = try_input_until(prompt, lambda s: s.isdigit() and (int(s) in range(1,5)))
-      action = int(inp)
+      action = try_input_until(prompt, lambda n: 1 <= n < 5, parse_number)
 
       if action == 4:
         break
       prompt = "Position(s)?\n>> "
-      def check_single(d):
-        return d.isdigit and (int(d) in range(0, game.width*game.height))
-      inp = try_input_until(prompt, lambda s: all(check_single(d) for d in s.split()))
-      positions = [int(d) for d in inp.split()]
+      fields = game.width * game.height
+      positions = try_input_until(prompt, lambda ns: all(n < fields for n in ns), parse_numbers)
       for pos in positions:
         i = pos // game.width
         j = pos % game.width
         try:
           if action == 1:
-             game.uncover(i, j)
+            over = game.uncover(i, j)
           elif action == 2:
-            game.flag(i, j)
+            over = game.flag(i, j)
           elif action == 3:
-            game.unflag(i, j)
+            over = game.unflag(i, j)
           else:
             raise Exception
         except Illegal:
           print("Invalid move.")
+        if over:
+          break
 
     print("#"*width)
     print("#"*width)